@@ -1,21 +1,47 @@
-import time
+import socket
+import sys
+import threading
 import warnings
 from dataclasses import asdict
 from typing import Optional, Union
 
 from dask.distributed import Client, LocalCluster
+from distributed.comm import parse_address, parse_host_port
 
 from hal.config import Cluster, cfg
 
+DEFAULT_SCHEDULER_PORT = 8786
+
+
+def _reachable(address: str, timeout: float = 0.1) -> bool:
+    """Check if a TCP connection can be made to `address` ("[protocol://]host[:port]")
+
+    Addresses which cannot be parsed as host and port are considered unreachable.
+    """
+    try:
+        _, location = parse_address(address)
+        host, port = parse_host_port(location, default_port=DEFAULT_SCHEDULER_PORT)
+    except ValueError:
+        return False
+
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
 
 def get_client(cluster_name: Optional[str] = None) -> Union[Client, None]:
     """Attempts to connect to a Dask cluster and returns the Client"""
     client = None
     if cluster_name is None:
-        for cluster_name in cfg.clusters:
+        for cluster in cfg.clusters.values():
+            if not _reachable(cluster.address):
+                continue
             try:
-                client = Client(cfg.clusters[cluster_name].address, timeout=1)
-            except OSError:
+                return Client(cluster.address, timeout=5)
+            except (OSError, TimeoutError):
+                # accepts connections but is not a (responsive) dask scheduler
                 continue
     else:
         client = Client(cfg.clusters[cluster_name].address, timeout=5)
@@ -36,14 +62,16 @@ def blocking_cluster(config: Union[dict, Cluster]) -> None:
     if ip not in ["127.0.0.1", "localhost"]:
         warnings.warn("Starting local cluster but specified IP is not local")
     local_cluster = LocalCluster(scheduler_port=int(port), **cfg_dic)
+    stop = threading.Event()
+    # KeyboardInterrupt interrupts lock waits in the main thread on POSIX; on Windows, and
+    # outside the main thread, wake up periodically instead
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    timeout = None if in_main_thread and sys.platform != "win32" else 2.0
     try:
-        loop = True
-        while loop:
-            try:
-                time.sleep(2)
-            except KeyboardInterrupt:
-                print("Interrupted")
-                loop = False
+        while not stop.wait(timeout):
+            pass
+    except KeyboardInterrupt:
+        print("Interrupted")
     finally:
         local_cluster.close()
 
@@ -1,8 +1,13 @@
 # %%
 
-from dataclasses import asdict, dataclass, field
+import functools
+import hashlib
+import itertools
+import pickle
+import struct
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, TypeVar, Generic
+from typing import Any, Optional, TypeVar, Generic
 
 import yaml
 from dacite import Config as DaciteConfig
@@ -13,12 +18,25 @@ from hal.utils import clean_types
 import os
 import sys
 
+try:
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pyyaml built without libyaml
+    from yaml import SafeDumper as _SafeDumper  # type: ignore
+    from yaml import SafeLoader as _SafeLoader  # type: ignore
 
+_YAML_DUMP_KWARGS = dict(Dumper=_SafeDumper, sort_keys=False, default_flow_style=False)
+
+
+_ROOT_FILES = ("pyproject.toml", "config.yaml")
+
+
+@functools.lru_cache(maxsize=64)
 def has_rootfiles(pth: Path) -> bool:
-    root_files = ["pyproject.toml", "config.yaml"]
-    return all((pth / f).exists() for f in root_files)
+    return all((pth / f).exists() for f in _ROOT_FILES)
 
 
+@functools.cache
 def find_project_root() -> Path:
     """Find the project root by looking for specific files in parent directories."""
     if env_root := os.getenv("HAL_PROJECT_ROOT"):
@@ -31,7 +49,7 @@ def find_project_root() -> Path:
         return maybe_root.absolute()
 
     current_path = Path.cwd().absolute()
-    for parent in [current_path] + list(current_path.parents):
+    for parent in itertools.chain((current_path,), current_path.parents):
         if has_rootfiles(parent):
             return parent
 
@@ -43,6 +61,68 @@ def find_project_root() -> Path:
 ROOT = find_project_root()
 
 
+def _user_cache_dir() -> Path:
+    """Per-user cache directory for hal, outside of any project tree"""
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "hal"
+
+
+# bump when the cache file layout changes; part of the cache file name together with the
+# pickle protocol, as the cache directory is shared between environments
+_YAML_CACHE_FORMAT = 1
+
+
+def load_yaml_cached(fpath: Path) -> Any:
+    """Load a yaml file, reusing a pickled copy if the file is unchanged.
+
+    The pickled copy is kept in the user cache directory, keyed by the resolved path of
+    `fpath`, and starts with the source file's mtime and size; on mismatch the yaml is
+    parsed again and the cache rewritten.
+    """
+    fpath = fpath.resolve()
+    stat = fpath.stat()
+    key = struct.pack("<qq", stat.st_mtime_ns, stat.st_size)
+    digest = hashlib.sha256(str(fpath).encode()).hexdigest()[:32]
+    cache_name = (
+        f"{fpath.stem}-{digest}-v{_YAML_CACHE_FORMAT}-p{pickle.HIGHEST_PROTOCOL}"
+    )
+    try:
+        cache_fpath = _user_cache_dir() / "yaml" / f"{cache_name}.pickle"
+    except (RuntimeError, OSError):
+        # no home directory to hold the cache; the cache is an optimization only
+        with fpath.open("rb") as f:
+            return yaml.load(f, Loader=_SafeLoader)
+
+    try:
+        with cache_fpath.open("rb") as f:
+            if f.read(len(key)) == key:
+                return pickle.load(f)
+    except Exception:
+        # missing or corrupt cache file; the cache is an optimization only
+        pass
+
+    with fpath.open("rb") as f:
+        data = yaml.load(f, Loader=_SafeLoader)
+
+    tmp_fpath = cache_fpath.with_name(f"{cache_fpath.name}.{os.getpid()}.tmp")
+    try:
+        cache_fpath.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_fpath.open("wb") as f:
+            f.write(key)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fpath, cache_fpath)
+    except OSError:
+        # unwritable cache directory; the cache is an optimization only
+        tmp_fpath.unlink(missing_ok=True)
+
+    return data
+
+
 @dataclass
 class Cluster:
     address: str
@@ -51,6 +131,34 @@ class Cluster:
     memory_limit: Optional[str] = None
 
 
+def _is_optional(value: Any, type_: type) -> bool:
+    return value is None or isinstance(value, type_)
+
+
+def _is_cluster_data(d: Any) -> bool:
+    """Check that `d` can be turned into a `Cluster` without dacite's type checks"""
+    if isinstance(d, Cluster):
+        return True
+    return (
+        isinstance(d, dict)
+        and isinstance(d.get("address"), str)
+        and _is_optional(d.get("n_workers"), int)
+        and _is_optional(d.get("threads_per_worker"), int)
+        and _is_optional(d.get("memory_limit"), str)
+    )
+
+
+def _cluster_from_dict(d: Data) -> Cluster:
+    c = object.__new__(Cluster)
+    c.__dict__.update(
+        address=d["address"],
+        n_workers=d.get("n_workers"),
+        threads_per_worker=d.get("threads_per_worker"),
+        memory_limit=d.get("memory_limit"),
+    )
+    return c
+
+
 K = TypeVar("K")
 V = TypeVar("V")
 
@@ -78,13 +186,14 @@ class MemoryDict(dict, Generic[K, V]):
         super().__setitem__(key, value)
 
     def __getitem__(self, key: K) -> V:
+        value = dict.__getitem__(self, key)
         self._used_keys.add(key)
-        value = super().__getitem__(key)
         return value
 
     def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
-        self._used_keys.add(key)
-        return super().get(key, default)
+        if key in self:
+            self._used_keys.add(key)
+        return dict.get(self, key, default)
 
     def update(self, *args, **kwargs) -> None:
         """Override update to check for reserved keys"""
@@ -103,18 +212,74 @@ class Config:
 
     @classmethod
     def from_dict(cls, data: Data):
+        if cls._is_fast_data(data):
+            return cls._from_dict_fast(data)
+
+        # anything else goes through dacite, which type checks and reports errors
         config = DaciteConfig(
             type_hooks={Path: lambda v: Path(v).expanduser()}, cast=[MemoryDict]
         )  # type: ignore
         return from_dict(cls, data, config)
 
+    @staticmethod
+    def _is_fast_data(data: Any) -> bool:
+        """Check that `data` has the exact shape `_from_dict_fast` expects"""
+        if not isinstance(data, dict):
+            return False
+
+        paths = data.get("paths", {})
+        clusters = data.get("clusters", {})
+        packages = data.get("packages", [])
+        return (
+            isinstance(data.get("root", ROOT), (str, Path))
+            and isinstance(paths, dict)
+            and all(isinstance(v, (str, Path)) for v in paths.values())
+            and isinstance(clusters, dict)
+            and all(_is_cluster_data(v) for v in clusters.values())
+            and isinstance(packages, list)
+            and all(isinstance(p, str) for p in packages)
+        )
+
+    @classmethod
+    def _from_dict_fast(cls, data: Data):
+        """Construct without dacite's type introspection; `data` is checked by `_is_fast_data`"""
+        clusters = {
+            k: v if isinstance(v, Cluster) else _cluster_from_dict(v)
+            for k, v in data.get("clusters", {}).items()
+        }
+        paths = MemoryDict(
+            {k: Path(v).expanduser() for k, v in data.get("paths", {}).items()}
+        )
+
+        cfg = object.__new__(cls)
+        cfg.__dict__.update(
+            root=Path(data.get("root", ROOT)).expanduser(),
+            paths=paths,
+            clusters=clusters,
+            packages=list(data.get("packages", [])),
+        )
+        return cfg
+
     @classmethod
     def from_yaml(cls, fpath: Path):
-        data = yaml.safe_load(fpath.read_text())
+        data = load_yaml_cached(fpath)
         return cls.from_dict(data)
 
-    def to_yaml(self, fpath: Path) -> None:
-        s = yaml.dump(clean_types(asdict(self)), sort_keys=False)
+    def to_dict(self) -> dict:
+        """Plain python (yaml-safe) representation of the config"""
+        return {
+            "root": str(self.root),
+            "paths": {k: str(v) for k, v in self.paths.items()},
+            "clusters": {k: dict(v.__dict__) for k, v in self.clusters.items()},
+            "packages": list(self.packages),
+        }
+
+    def to_yaml(self, fpath: Path, clean: bool = False) -> None:
+        data = self.to_dict()
+        if clean:
+            data = clean_types(data)
+
+        s = yaml.dump(data, **_YAML_DUMP_KWARGS)
         fpath.write_text(s)
 
     def update(self, data: Data):
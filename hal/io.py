@@ -5,7 +5,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Iterable
-import yaml
 
 from hal.utils import clean_types
 
@@ -94,10 +93,19 @@ def save_fig(
 
 
 def save_yaml(data, file_path: Path, clean: bool = True):
+    import yaml
+
+    # full (non-safe) dumper: values `clean_types` leaves alone, such as tuples or
+    # `np.bool_`, are written with python tags rather than rejected
+    try:
+        from yaml import CDumper as _Dumper
+    except ImportError:  # pyyaml built without libyaml
+        from yaml import Dumper as _Dumper  # type: ignore
+
     if clean:
         data = clean_types(data)
 
-    file_path.write_text(yaml.dump(data))
+    file_path.write_text(yaml.dump(data, Dumper=_Dumper))
 
 
 def save_str(s: str, file_path: Path):
@@ -1,8 +1,12 @@
 import atexit
+import functools
 import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import traceback
-import distutils.sysconfig as sysconfig
 import importlib
+import importlib.metadata
+import json
 import pkgutil
 import subprocess
 import sys
@@ -13,9 +17,6 @@ from typing import Callable, Generator, Iterable, Optional
 import warnings
 import types
 
-
-import watermark
-
 from hal.config import cfg
 
 ExcepthookType = Callable[
@@ -25,23 +26,67 @@ ExcepthookType = Callable[
 
 MAX_DATA_DIR_FILES = 50_000
 
+# files up to this size are read ahead in worker threads by `zipdir`; larger ones are streamed
+ZIP_READAHEAD_MAX_SIZE = 1024**2
+
+# fast deflate; sources and file listings compress well even at low levels
+ZIP_KWARGS = dict(compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+
+# standard library and builtin module names, fixed for the lifetime of the process
+_STDLIB = frozenset(sys.stdlib_module_names)
+_BUILTINS = frozenset(sys.builtin_module_names)
+
+# globals from which watermark (`iversions`) resolves package versions; these are cheap
+# references, unlike data objects in the script's namespace
+_IMPORT_GLOBAL_TYPES = (
+    ModuleType,
+    type,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+)
+
+
+def _walk_files(
+    root: str | os.PathLike, skip_dirs: frozenset[str] = frozenset()
+) -> Generator[str, None, None]:
+    """Yield paths of all files below `root`, not descending into `skip_dirs` or symlinked
+    directories. Directories which cannot be read (including a missing `root`) are skipped.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+
 
 def data_dir_to_str(data_dir: Path) -> str:
-    all_files = [
-        f.relative_to(data_dir).as_posix() for f in data_dir.glob("**/*") if f.is_file()
-    ]
+    root_str = os.fspath(data_dir)
+    files = []
+    total = 0
+    for path_str in _walk_files(root_str):
+        total += 1
+        if total <= MAX_DATA_DIR_FILES:
+            files.append(os.path.relpath(path_str, root_str).replace(os.sep, "/"))
 
     s = ""
 
-    if not all_files:
+    if not files:
         return s
 
     s += f"Data directory: {data_dir.as_posix()}\n"
 
-    if len(all_files) > MAX_DATA_DIR_FILES:
-        s += f"  (showing first {MAX_DATA_DIR_FILES} of {len(all_files)} files)\n"
+    if total > MAX_DATA_DIR_FILES:
+        s += f"  (showing first {MAX_DATA_DIR_FILES} of {total} files)\n"
 
-    file_str = "\n".join(all_files[:MAX_DATA_DIR_FILES])
+    file_str = "\n".join(files)
     s += file_str + "\n"
     return s
 
@@ -58,22 +103,121 @@ def gen_imports(globals_: dict) -> Generator:
                 pass
 
 
+def _read_for_zip(path_str: str, arcname: str) -> tuple[zipfile.ZipInfo, bytes | None]:
+    zinfo = zipfile.ZipInfo.from_file(path_str, arcname)
+    if zinfo.file_size > ZIP_READAHEAD_MAX_SIZE:
+        return zinfo, None
+    with open(path_str, "rb") as f:
+        return zinfo, f.read()
+
+
 def zipdir(path: Path, zipf: zipfile.ZipFile, root: str = ""):
-    for file_path in path.glob("**/*"):
-        if "__pycache__" in file_path.parts:
-            continue
+    """Add all files in `path` to `zipf` under `root`
+
+    Files are read ahead by a thread pool while the calling thread compresses and writes.
+    """
+    root = root or path.stem
+    root_str = os.fspath(path)
+    n_workers = min(8, os.cpu_count() or 1)
+    pending: deque[tuple[str, Future]] = deque()
+
+    def write_next():
+        path_str, future = pending.popleft()
+        zinfo, data = future.result()
+        if data is None:
+            zipf.write(path_str, zinfo.filename)
+        else:
+            zipf.writestr(
+                zinfo,
+                data,
+                compress_type=zipf.compression,
+                compresslevel=zipf.compresslevel,
+            )
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        for path_str in _walk_files(root_str, skip_dirs=frozenset({"__pycache__"})):
+            arcname = os.path.join(root, os.path.relpath(path_str, root_str))
+            pending.append(
+                (path_str, executor.submit(_read_for_zip, path_str, arcname))
+            )
+            # bound memory use to 4 * n_workers files of at most ZIP_READAHEAD_MAX_SIZE
+            if len(pending) >= 4 * n_workers:
+                write_next()
+
+        while pending:
+            write_next()
 
-        root = root or path.stem
-        if file_path.is_file():
-            relpath = file_path.relative_to(path)
-            zipf.write(file_path, Path(root) / relpath)
 
+@functools.cache
+def _editable_packages(root: Path) -> frozenset[str]:
+    """Names of packages found in the `editable` directory of project `root`"""
+    editable_dir = root / "editable"
+    if not editable_dir.exists():
+        return frozenset()
 
-def is_git_repo():
+    editable_modules = [f for f in editable_dir.iterdir() if f.is_dir()]
+    return frozenset(p.name for p in pkgutil.iter_modules(editable_modules))
+
+
+def _direct_url(dist: importlib.metadata.Distribution) -> Optional[dict]:
+    """Parsed PEP 610 `direct_url.json` of `dist`, or None if absent or invalid"""
+    direct_url = dist.read_text("direct_url.json")
+    if not direct_url:
+        return None
+    try:
+        data = json.loads(direct_url)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and "url" in data else None
+
+
+def _is_editable(direct_url: Optional[dict]) -> bool:
+    """Check a parsed `direct_url.json` for an editable install"""
+    if direct_url is None:
+        return False
+    dir_info = direct_url.get("dir_info")
+    return isinstance(dir_info, dict) and bool(dir_info.get("editable", False))
+
+
+def _freeze_line(name: str, version: str, direct_url: Optional[dict]) -> str:
+    """Requirement line for a distribution, as written by `pip freeze`"""
+    if direct_url is None:
+        return f"{name}=={version}"
+
+    url = direct_url["url"]
+    vcs_info = direct_url.get("vcs_info")
+    if isinstance(vcs_info, dict) and "vcs" in vcs_info:
+        url = f"{vcs_info['vcs']}+{url}"
+        if commit_id := vcs_info.get("commit_id"):
+            url = f"{url}@{commit_id}"
+    return f"{name} @ {url}"
+
+
+def freeze_distributions() -> list[str]:
+    """List installed, non-editable distributions as sorted requirement lines
+
+    Distributions installed from a direct URL (VCS, local archive or directory) are
+    listed as `name @ url`, others as `name==version`.
+    """
+    lines = set()
+    for d in importlib.metadata.distributions():
+        name = d.metadata["Name"]
+        if not name:
+            continue
+        direct_url = _direct_url(d)
+        if not _is_editable(direct_url):
+            lines.add(_freeze_line(name, d.version, direct_url))
+    return sorted(lines, key=str.lower)
+
+
+@functools.cache
+def is_git_repo(repo_path: Path = cfg.root) -> bool:
     try:
         # Run git command to check if we're in a git repository
         subprocess.check_output(
-            ["git", "rev-parse", "--is-inside-work-tree"], stderr=subprocess.STDOUT
+            ["git", "rev-parse", "--is-inside-work-tree"],
+            cwd=repo_path,
+            stderr=subprocess.STDOUT,
         )
         return True
     except subprocess.CalledProcessError:
@@ -97,6 +241,26 @@ def fetch_git_status(repo_path: Path = cfg.root) -> list[str]:
     return lines
 
 
+def count_git_status(lines: Iterable[str]) -> dict[str, int]:
+    """Count untracked/modified/added/deleted/renamed entries in `git status --porcelain` lines"""
+    counts = dict.fromkeys(["untracked", "modified", "added", "deleted", "renamed"], 0)
+    for line in lines:
+        status = line[:2]
+        if status == "??":
+            counts["untracked"] += 1
+            continue
+        if "M" in status:
+            counts["modified"] += 1
+        if "D" in status:
+            counts["deleted"] += 1
+        if status == "A ":
+            counts["added"] += 1
+        elif status == "R ":
+            counts["renamed"] += 1
+
+    return counts
+
+
 def is_git_clean(repo_path: Path = cfg.root) -> bool:
     status = (
         subprocess.check_output(["git", "status", "--porcelain"], cwd=repo_path)
@@ -122,33 +286,25 @@ def excepthook(
 
 
 def _reproduce(
-    globals_: dict,
+    script_file: str,
+    imports: Iterable[str],
+    import_globals: dict[str, object],
     packages: Optional[Iterable[str]] = None,
     external_data_paths: Optional[dict[str, Path]] = None,
     **watermark_kwargs,
 ):
-    script_path = Path(globals_["__file__"])
+    script_path = Path(script_file)
     output_path = script_path.parent / "output"
     output_path.mkdir(exist_ok=True, parents=True)
 
-    # get editable packages
-    editable_modules = []
-    if (cfg.root / "editable").exists():
-        editable_modules = [f for f in (cfg.root / "editable").iterdir() if f.is_dir()]
-
-    pkgs = pkgutil.iter_modules(editable_modules)
-    editable_packages = {p.name for p in pkgs}
-
     # combine user packages, imported packages and editable packages
-    combined = set(packages or []) | set(gen_imports(globals_)) | editable_packages
+    combined = set(packages or []) | set(imports) | _editable_packages(cfg.root)
 
     # Remove builtins
-    combined -= {sys.builtin_module_names}
+    combined -= _BUILTINS
 
     # Remove standard library
-    stdlib_pth = sysconfig.get_python_lib(standard_lib=True)
-    stdlib = {p.stem.replace(".py", "") for p in Path(stdlib_pth).iterdir()}
-    combined -= stdlib
+    combined -= _STDLIB
 
     # Remove hal / builtins
     combined -= {"hal", "builtins"}
@@ -172,22 +328,18 @@ def _reproduce(
         lines = fetch_git_status()
         if lines:
             unclean = "\n".join(lines)
-            counts = {
-                "untracked": sum(1 for line in lines if line.startswith("??")),
-                "modified": sum(1 for line in lines if "M" in line[:2]),
-                "added": sum(1 for line in lines if line.startswith("A ")),
-                "deleted": sum(1 for line in lines if "D" in line[:2]),
-                "renamed": sum(1 for line in lines if line.startswith("R ")),
-            }
+        counts = count_git_status(lines)
         warnings.warn(
             f"There are {counts['untracked']} untracked, {counts['modified']} modified, {counts['added']} added, {counts['deleted']} deleted, and {counts['renamed']} renamed files in the git repository."
         )
     else:
-        warnings.warn("Current directory is not a git repository.")
+        warnings.warn(f"Project root {cfg.root} is not a git repository.")
+
+    import watermark
 
     mark_kwargs.update(watermark_kwargs)
     mark = watermark.watermark(
-        globals_=globals_,
+        globals_=import_globals,
         packages=",".join(sorted(combined)),
         **mark_kwargs,  # type: ignore
     )
@@ -213,17 +365,8 @@ def _reproduce(
         mark += "Git repository is unclean:\n"
         mark += unclean
 
-    # Run the command and capture the output
-    freeze = subprocess.run(
-        ["uv", "pip", "freeze", "--no-color"],
-        capture_output=True,
-        text=True,
-        env={**subprocess.os.environ, "NO_COLOR": "1"},  # type: ignore
-    )
-    freeze_str = freeze.stdout
-    # remove editable packages from freeze output
-    lines = [line for line in freeze_str.splitlines() if not line.startswith("-e")]
-    freeze_no_editable = "\n".join(lines)
+    # installed (non-editable) distributions, in `pip freeze` format
+    freeze_no_editable = "\n".join(freeze_distributions())
 
     external_keys = sorted(cfg.paths._used_keys)
     external_paths = (
@@ -233,17 +376,15 @@ def _reproduce(
     )
 
     script_root = script_path.parent
-    with zipfile.ZipFile(
-        output_path / "_rpr.zip", "w", zipfile.ZIP_DEFLATED
-    ) as rpr_zip:
-        script_files = script_root.glob("*.*")
-        for f in script_files:
-            rpr_zip.write(f, Path("scripts") / f.relative_to(script_root))
+    with zipfile.ZipFile(output_path / "_rpr.zip", "w", **ZIP_KWARGS) as rpr_zip:
+        # top-level files of the script directory (`*.*`); the output directory is skipped
+        with os.scandir(script_root) as it:
+            for entry in it:
+                if "." in entry.name and entry.is_file():
+                    rpr_zip.write(entry.path, os.path.join("scripts", entry.name))
         rpr_zip.writestr("watermark.txt", mark)
 
         rpr_zip.writestr("uv_pip_freeze.txt", freeze_no_editable)
-        if freeze.stderr:
-            rpr_zip.writestr("uv_pip_freeze_error.txt", freeze.stderr)
 
         # copy root lockfile:
         lockfile = cfg.root / "uv.lock"
@@ -261,16 +402,11 @@ def _reproduce(
             s = "\n".join(
                 traceback.format_exception(error_type, error_value, error_traceback)
             )
+            rpr_zip.writestr("error.txt", s)
 
-            with zipfile.ZipFile(
-                output_path / "_rpr.zip", "w", zipfile.ZIP_DEFLATED
-            ) as rpr_zip:
-                rpr_zip.writestr("error.txt", s)
-
-                # write the contents of (external) data directories
-
+    # write the contents of (external) data directories
     with zipfile.ZipFile(
-        output_path / f"_data_sources_{script_path.stem}.zip", "w", zipfile.ZIP_DEFLATED
+        output_path / f"_data_sources_{script_path.stem}.zip", "w", **ZIP_KWARGS
     ) as rpr_zip:
         for k, v in external_paths.items():
             s = data_dir_to_str(v)
@@ -332,9 +468,14 @@ def reproduce(
             "Git working directory is dirty. Commit/stash or set FORCE_CLEAN_GIT=false"
         )
 
+    # snapshot only what `_reproduce` needs, rather than keeping all script globals alive
     atexit.register(
         _reproduce,
-        globals_=globals_.copy(),
+        script_file=globals_["__file__"],
+        imports=sorted(set(gen_imports(globals_))),
+        import_globals={
+            k: v for k, v in globals_.items() if isinstance(v, _IMPORT_GLOBAL_TYPES)
+        },
         packages=packages,
         external_data_paths=external_data_paths,
         **watermark_kwargs,
@@ -1,9 +1,8 @@
 import ultraplot as uplt
-import yaml
 
-from hal.config import cfg
+from hal.config import cfg, load_yaml_cached
 
-uplt_cfg = yaml.safe_load((cfg.root / "ultraplot_presets.yaml").read_text())
+uplt_cfg = load_yaml_cached(cfg.root / "ultraplot_presets.yaml")
 
 
 def load_uplt_config(preset: str = "paper") -> None:
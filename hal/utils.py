@@ -1,6 +1,6 @@
 from functools import reduce
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, Callable, Iterable, Optional, TypeVar
 from collections import OrderedDict
 
 import numpy as np
@@ -11,6 +11,45 @@ def longpath(pth: Path) -> Path:
     return Path(r"//?/" + str(pth))
 
 
+# per-type handlers for `clean_types`; container types map to the output container type,
+# leaf types to a converter (None: keep value as is). Other types are resolved on first use.
+_CONTAINER_TYPES: dict[type, type] = {
+    dict: dict,
+    OrderedDict: dict,
+    list: list,
+    tuple: tuple,
+}
+_LEAF_CONVERTERS: dict[type, Optional[Callable[[Any], Any]]] = {
+    str: None,
+    int: None,
+    float: None,
+    bool: None,
+    type(None): None,
+    np.ndarray: np.ndarray.tolist,
+    type(Path()): str,
+}
+
+
+def _resolve_type(t: type) -> None:
+    """Classify `t` for `clean_types` and store the result in the dispatch tables"""
+    if issubclass(t, np.floating):
+        _LEAF_CONVERTERS[t] = float
+    elif issubclass(t, np.integer):
+        _LEAF_CONVERTERS[t] = int
+    elif issubclass(t, np.ndarray):
+        _LEAF_CONVERTERS[t] = np.ndarray.tolist
+    elif issubclass(t, list):
+        _CONTAINER_TYPES[t] = list
+    elif issubclass(t, tuple):
+        _CONTAINER_TYPES[t] = tuple
+    elif issubclass(t, dict):
+        _CONTAINER_TYPES[t] = dict
+    elif issubclass(t, Path):
+        _LEAF_CONVERTERS[t] = str
+    else:
+        _LEAF_CONVERTERS[t] = None
+
+
 def clean_types(d: Any) -> Any:
     """cleans up nested dict/list/tuple/other `d` for exporting as yaml
 
@@ -20,32 +59,52 @@ def clean_types(d: Any) -> Any:
     # https://stackoverflow.com/questions/59605943/python-convert-types-in-deeply-nested-dictionary-or-array
 
     """
-    if isinstance(d, np.floating):
-        return float(d)
-
-    if isinstance(d, np.integer):
-        return int(d)
-
-    if isinstance(d, np.ndarray):
-        return d.tolist()
-
-    if isinstance(d, list):
-        return [clean_types(item) for item in d]
-
-    if isinstance(d, tuple):
-        return tuple(clean_types(item) for item in d)
-
-    if isinstance(d, OrderedDict):
-        return clean_types(dict(d))
-
-    if isinstance(d, dict):
-        return {k: clean_types(v) for k, v in d.items()}
-
-    if isinstance(d, Path):
-        return str(d)
-
-    else:
-        return d
+    root: list[Any] = [None]
+    # entries are (output, items, id of the input container); an entry without output marks
+    # the end of that container's subtree
+    stack: list[tuple[Any, Optional[Iterable[tuple[Any, Any]]], Optional[int]]] = [
+        (root, enumerate((d,)), None)
+    ]
+    # ids of the containers on the path from the root, to detect reference cycles
+    active: set[int] = set()
+    tuples: list[tuple[Any, Any, list]] = []
+
+    while stack:
+        out, items, oid = stack.pop()
+        if items is None:
+            active.discard(oid)
+            continue
+        if oid is not None:
+            active.add(oid)
+        for k, v in items:
+            t = type(v)
+            if t not in _CONTAINER_TYPES and t not in _LEAF_CONVERTERS:
+                _resolve_type(t)
+
+            container = _CONTAINER_TYPES.get(t)
+            if container is None:
+                converter = _LEAF_CONVERTERS[t]
+                out[k] = v if converter is None else converter(v)
+                continue
+
+            vid = id(v)
+            if vid in active:
+                raise ValueError("Cannot clean input containing a reference cycle")
+            stack.append((None, None, vid))
+            if container is dict:
+                out[k] = child = dict.fromkeys(v)
+                stack.append((child, v.items(), vid))
+            else:
+                out[k] = child = [None] * len(v)
+                stack.append((child, enumerate(v), vid))
+                if container is tuple:
+                    tuples.append((out, k, child))
+
+    # tuples are filled as lists; convert innermost first
+    for parent, key, out in reversed(tuples):
+        parent[key] = tuple(out)
+
+    return root[0]
 
 
 # https://stackoverflow.com/questions/31174295/getattr-and-setattr-on-nested-subobjects-chained-properties/31174427#31174427